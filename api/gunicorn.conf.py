@@ -0,0 +1,27 @@
+"""Gunicorn settings for the WhisperX transcription service.
+
+Run from the `api/` directory with:
+
+    gunicorn -c gunicorn.conf.py whipserx:app
+
+A single worker keeps exactly one copy of the WhisperX and alignment
+weights in GPU memory; concurrency comes from threads, and GPU inference
+is serialized inside the app. The app is deliberately not preloaded: CUDA
+cannot be used in a child forked after the parent initialized it, so the
+models are loaded inside the worker.
+
+The worker imports the app, and with it every model replica, before its
+first heartbeat, so a cold start that downloads weights can take minutes.
+`timeout` is therefore generous (override with GUNICORN_TIMEOUT); under
+gthread it only bounds that boot and a stuck worker, since jobs run on the
+app's own executor rather than on request threads.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5001)}"
+preload_app = False
+workers = 1
+worker_class = 'gthread'
+# each open /transcribe/stream holds a thread; keep this above MAX_EVENT_STREAMS
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 900))
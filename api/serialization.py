@@ -0,0 +1,10 @@
+"""JSON encoding shared by the WhisperX transcription service."""
+import orjson
+
+# WhisperX alignment yields word timestamps as numpy.float64 (pandas
+# min/max), which orjson rejects unless numpy serialization is enabled
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def dumps_json(obj):
+    """Serialize `obj` to JSON bytes, accepting numpy scalars and arrays."""
+    return orjson.dumps(obj, option=JSON_OPTIONS)
@@ -68,7 +68,7 @@ function formatTranscriptResponse(data: PythonAPIResponse): ClientResponse {
  * 202 accepted response if the Python service queued the job.
  */
 app.post('/api/transcribe', async (req: Request, res: Response) => {
-    const { youtube_url, year, committee, bill_name, bill_ids, video_title, hearing_date, room, ampm } = req.body;
+    const { youtube_url, year, committee, bill_name, bill_ids, video_title, hearing_date, room, ampm, align } = req.body;
 
   const validatedHearingDate = hearing_date || new Date().toISOString().split('T')[0];
   const hasCommittee = Array.isArray(committee) ? committee.length > 0 : !!committee;
@@ -96,6 +96,10 @@ app.post('/api/transcribe', async (req: Request, res: Response) => {
       room: room,
       ampm: ampm
     };
+    // only forward align when the client set it, so the Python default applies otherwise
+    if (align !== undefined) {
+      requestPayload.align = align;
+    }
 
         const response = await axios.post<PythonAPIResponse>(
             `${PYTHON_API_URL}/transcribe`, 
@@ -128,7 +132,14 @@ app.post('/api/transcribe', async (req: Request, res: Response) => {
     } catch (error) {
         console.error('Error during transcription:', error);
 
-        if (axios.isAxiosError(error)) {
+        if (axios.isAxiosError(error) && error.response?.status === 429) {
+            // the Python service is at its pending-job limit; let the client back off
+            const retryAfter = error.response.headers['retry-after'];
+            if (retryAfter) {
+                res.set('Retry-After', String(retryAfter));
+            }
+            res.status(429).json(error.response.data);
+        } else if (axios.isAxiosError(error)) {
             console.error('Python API Error:', error.response?.data || error.message);
             res.status(error.response?.status || 500).json({
                 error: 'Transcription failed',
@@ -0,0 +1,23 @@
+import numpy as np
+import orjson
+
+from serialization import dumps_json
+
+def test_segment_with_numpy_timestamps():
+    segment = {
+        'id': 0,
+        'start': np.float64(1.25) + 900,
+        'end': np.float64(2.5) + 900,
+        'text': 'The committee will come to order.',
+        'words': [{'word': 'The', 'start': np.float64(1.25) + 900, 'end': np.float64(1.4) + 900}],
+    }
+
+    assert orjson.loads(dumps_json({'segments': [segment]})) == {
+        'segments': [{
+            'id': 0,
+            'start': 901.25,
+            'end': 902.5,
+            'text': 'The committee will come to order.',
+            'words': [{'word': 'The', 'start': 901.25, 'end': 901.4}],
+        }],
+    }
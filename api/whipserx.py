@@ -1,25 +1,44 @@
 import os
+
+# must run before `import torch`: grow CUDA allocator segments in place
+os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True')
+
+import io
+import gzip
+import logging
 import re
-import sys
 import math
+import hashlib
 import uuid
-import json
 import subprocess
+import queue
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from contextlib import contextmanager
+from functools import lru_cache
 import tempfile
+import wave
 import shutil
 import time
 
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+import orjson
+from requests.adapters import HTTPAdapter
 import torch
 import whisperx
 import yt_dlp
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage
+from google.cloud.exceptions import NotFound
+
+from serialization import dumps_json
 
 """WhisperX transcription Flask service.
 
@@ -29,39 +48,249 @@ run WhisperX transcription and alignment, and upload results to GCS.
 Configuration:
 - GCS_BUCKET: Google Cloud Storage bucket for uploads
 - WHISPER_MODEL_NAME: model identifier used by whisperx
+- WHISPER_MODEL_DIR: persistent directory for downloaded model weights
+- WHISPER_COMPUTE_TYPE: CTranslate2 compute type (int8_float16, float16, int8)
+- WHISPER_BATCH_SIZE: number of 30s windows decoded per GPU batch
+- WHISPER_INITIAL_PROMPT: fixed prompt given to every decoding window
+- WHISPER_BEAM_SIZE: decoder beam width (1 = greedy)
+- WHISPER_CPU_THREADS: CTranslate2 threads per replica
+- TORCH_NUM_THREADS: intra-op threads for torch (alignment, VAD)
+- COMPILE_ALIGN_MODEL: set to 1 to torch.compile the alignment model
+- QUANTIZE_ALIGN_MODEL: set to 0 to keep the CPU alignment model in fp32
+- SPLIT_ON_SILENCE: set to 0 to cut chunks at fixed boundaries
+- SINGLE_PASS_MAX_SECONDS: longest audio transcribed without splitting
+- TRANSCRIBE_WORKERS: number of jobs processed concurrently
+- MAX_PENDING_JOBS: queued plus running jobs accepted before returning 429
+- JOB_RETENTION_SECONDS: how long finished jobs stay at /transcribe/status
+- MAX_EVENT_STREAMS: concurrent /transcribe/stream connections before 503
+- CHUNK_CACHE_PREFIX: GCS prefix for reusable per-chunk results (off if unset)
 
 Notes:
+- Serve with `gunicorn -c gunicorn.conf.py whipserx:app` from `api/` so the
+    models load once (single worker) and are shared by its threads.
 - The module relies on external binaries (ffmpeg/ffprobe) and temporary
     directories. Production deployment should add rate limiting, job queue
     management, timeout handling, and robust logging.
 """
 
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(threadName)s %(message)s',
+)
+logger = logging.getLogger(__name__)
+
 # Configurations (can be adjusted as needed)
 MAX_VIDEO_DURATION_SECONDS = 10800
 MAX_AUDIO_FILE_SIZE_MB = 500
 CHUNK_LENGTH_MS = 15 * 60 * 1000
+# Move chunk boundaries to the nearest silence within this many seconds
+SPLIT_ON_SILENCE = os.getenv('SPLIT_ON_SILENCE', '1') == '1'
+SILENCE_SEARCH_WINDOW_SECONDS = 30
+# Audio up to this length is sent to WhisperX in one call when only one
+# replica is loaded; its batched pipeline already windows the audio itself
+SINGLE_PASS_MAX_SECONDS = int(os.getenv('SINGLE_PASS_MAX_SECONDS', 60 * 60))
+# Optional GCS prefix for per-chunk results, so a retried job skips chunks
+# whose audio was already transcribed
+CHUNK_CACHE_PREFIX = os.getenv('CHUNK_CACHE_PREFIX', '').strip('/') or None
 MODEL_NAME = os.getenv('WHISPER_MODEL_NAME', 'large-v3')
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+# fp32 matmuls/convs outside autocast (alignment, VAD) may use TF32 tensor cores
+if DEVICE == "cuda":
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+# Several jobs can run torch ops at once, so cap each op's thread pool to
+# avoid oversubscribing cores shared with CTranslate2 and ffmpeg
+if os.getenv('TORCH_NUM_THREADS'):
+    torch.set_num_threads(int(os.getenv('TORCH_NUM_THREADS')))
+# Persistent directory for model weights; None uses the Hugging Face cache (HF_HOME)
+MODEL_CACHE_DIR = os.getenv('WHISPER_MODEL_DIR') or None
+# int8 weights with fp16 activations on GPU; plain int8 on CPU
+COMPUTE_TYPE = os.getenv('WHISPER_COMPUTE_TYPE', "int8_float16" if DEVICE == "cuda" else "int8")
+# int8 weights leave VRAM headroom for a wider encoder batch on GPU
+BATCH_SIZE = int(os.getenv('WHISPER_BATCH_SIZE', 32 if DEVICE == "cuda" else 4))
+# Opt-in: compile the wav2vec2 alignment model. Segment lengths vary, so it
+# is compiled with dynamic shapes rather than CUDA-graph "reduce-overhead"
+COMPILE_ALIGN_MODEL = os.getenv('COMPILE_ALIGN_MODEL', '0') == '1'
+# On CPU, run the alignment model's Linear layers in int8 (GPU uses fp16 autocast)
+QUANTIZE_ALIGN_MODEL = DEVICE == "cpu" and os.getenv('QUANTIZE_ALIGN_MODEL', '1') == '1'
+# Decode every 30s window independently so windows can be batched; an
+# optional fixed prompt (e.g. "State legislative hearing transcript.")
+# biases vocabulary without growing the decoder prefix window to window
+ASR_OPTIONS = {
+    'condition_on_previous_text': False,
+    'initial_prompt': os.getenv('WHISPER_INITIAL_PROMPT') or None,
+    # greedy decoding; hearing audio is clean enough that beam search rarely
+    # changes the output but multiplies decoder work
+    'beam_size': int(os.getenv('WHISPER_BEAM_SIZE', 1)),
+    'best_of': 1,
+}
+# CTranslate2 intra-op threads; on CPU the default of 4 leaves cores idle
+CPU_THREADS = int(os.getenv('WHISPER_CPU_THREADS', (os.cpu_count() or 4) if DEVICE == "cpu" else 4))
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider that serializes `jsonify` responses with orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps_json(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
-storage_client = storage.Client()
 BUCKET_NAME = os.getenv('GCS_BUCKET', 'hearing_videos')
+LIST_FETCH_WORKERS = 32
+GCS_CACHE_SIZE = 1024
+GCS_DOCUMENT_CACHE_SIZE = 16
+MISSING_BLOB_TTL_SECONDS = 30
+MISSING_BLOB_CACHE_SIZE = 1024
+LIST_CACHE_TTL_SECONDS = 30
+GCS_POOL_SIZE = 64
+# Multiple of 256 KiB, as required for resumable upload chunks
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Level 1 is cheap on CPU and still shrinks repetitive transcript JSON ~4x
+UPLOAD_GZIP_LEVEL = 1
+# Custom-metadata key holding a copy of metadata.json, so listings need no
+# per-blob download; GCS caps all custom metadata on a blob at 8 KiB
+LISTING_METADATA_KEY = 'listing'
+LISTING_METADATA_MAX_BYTES = 7 * 1024
+UPLOAD_WORKERS = 4
+
+def create_storage_client(pool_size=GCS_POOL_SIZE):
+    """Create a long-lived GCS client with a larger keep-alive pool.
+
+    The default session keeps 10 connections per host, which throttles the
+    parallel metadata fetches; extra requests would open new TLS
+    connections and discard them.
+    """
+    credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    session.mount('https://', HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+    return storage.Client(project=project, credentials=credentials, _http=session)
 
-print("Loading WhisperX model...")
-if DEVICE == "cuda":
-    model = whisperx.load_model(MODEL_NAME, device=DEVICE, compute_type="float16")
-else:
-    model = whisperx.load_model(MODEL_NAME, device=DEVICE, compute_type="int8" )
-alignment_model, metadata = whisperx.load_align_model(language_code='en', device=DEVICE)
-print(f"WhisperX model '{MODEL_NAME}' loaded on {DEVICE}.")
+storage_client = create_storage_client()
+# Bucket handles are plain references (no API call); build it once for reuse
+bucket = storage_client.bucket(BUCKET_NAME)
+# Shared across jobs so a job's metadata and transcript upload side by side
+upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='gcs-upload')
+
+def load_model_replica(device_index=0):
+    """Load the WhisperX ASR and alignment models onto one device.
+
+    Returns a dict with the device string and the loaded models.
+    """
+    device = f"cuda:{device_index}" if DEVICE == "cuda" else DEVICE
+    asr_model = whisperx.load_model(
+        MODEL_NAME, device=DEVICE, device_index=device_index,
+        compute_type=COMPUTE_TYPE, asr_options=ASR_OPTIONS,
+        download_root=MODEL_CACHE_DIR, threads=CPU_THREADS
+    )
+    align_model, align_metadata = whisperx.load_align_model(
+        language_code='en', device=device, model_dir=MODEL_CACHE_DIR
+    )
+    if QUANTIZE_ALIGN_MODEL:
+        align_model = torch.ao.quantization.quantize_dynamic(align_model, {torch.nn.Linear}, dtype=torch.qint8)
+    if COMPILE_ALIGN_MODEL:
+        align_model = torch.compile(align_model, dynamic=True)
+    return {
+        'device': device,
+        'model': asr_model,
+        'alignment_model': align_model,
+        'metadata': align_metadata,
+    }
+
+logger.info("Loading WhisperX model...")
+# One replica per visible GPU so independent chunks can run side by side
+replicas = [load_model_replica(i) for i in range(torch.cuda.device_count() if DEVICE == "cuda" else 1)]
+replica_pool = queue.Queue()
+for replica in replicas:
+    replica_pool.put(replica)
+logger.info("WhisperX model '%s' loaded on %s (%s), %s replica(s).", MODEL_NAME, DEVICE, COMPUTE_TYPE, len(replicas))
+
+@contextmanager
+def acquire_replica():
+    """Borrow an idle model replica, blocking until one is free.
+
+    A replica is used by one thread at a time, which also serializes
+    inference on each GPU.
+    """
+    replica = replica_pool.get()
+    try:
+        yield replica
+    finally:
+        replica_pool.put(replica)
+
+# Jobs run on a bounded pool instead of a thread per request; one slot more
+# than the replica count lets the next download overlap current inference
+TRANSCRIBE_WORKERS = int(os.getenv('TRANSCRIBE_WORKERS', len(replicas) + 1))
+job_executor = ThreadPoolExecutor(max_workers=TRANSCRIBE_WORKERS, thread_name_prefix='transcribe')
+# Queued plus running jobs accepted before /transcribe answers 429
+MAX_PENDING_JOBS = int(os.getenv('MAX_PENDING_JOBS', 20))
+# How long finished jobs stay visible at /transcribe/status
+JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', 3600))
+PENDING_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('completed', 'failed')
+# folder_path -> status dict for jobs submitted to this process
+jobs = {}
+# folder_path -> monotonic eviction deadline of finished jobs, oldest first
+finished_jobs = {}
+# number of jobs in `jobs` that are queued or running
+pending_jobs = 0
+jobs_lock = threading.Lock()
+# signalled on every status change so event streams wake without polling
+jobs_changed = threading.Condition(jobs_lock)
+SSE_KEEPALIVE_SECONDS = 15
+# Each open event stream holds a server thread; keep this well below
+# GUNICORN_THREADS so streams cannot starve the other endpoints
+MAX_EVENT_STREAMS = int(os.getenv('MAX_EVENT_STREAMS', 4))
+# Streams end after this long and the browser's EventSource reconnects,
+# so an abandoned watcher cannot keep its slot for a whole job
+SSE_MAX_STREAM_SECONDS = 300
+event_stream_slots = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+def record_job_status(folder_path, status, **fields):
+    """Update a job's status; the caller must hold `jobs_lock`.
+
+    Keeps `pending_jobs` in step with the transition and evicts finished
+    jobs older than JOB_RETENTION_SECONDS, so `jobs` stays bounded.
+    """
+    global pending_jobs
+    job = jobs.setdefault(folder_path, {'folder_path': folder_path})
+    was_pending = job.get('status') in PENDING_STATUSES
+    job.update(fields, status=status, updated_at=datetime.now().isoformat())
+    pending_jobs += (status in PENDING_STATUSES) - was_pending
+
+    now = time.monotonic()
+    finished_jobs.pop(folder_path, None)
+    if status in FINISHED_STATUSES:
+        finished_jobs[folder_path] = now + JOB_RETENTION_SECONDS
+    while finished_jobs:
+        oldest, deadline = next(iter(finished_jobs.items()))
+        if deadline > now:
+            break
+        del finished_jobs[oldest]
+        jobs.pop(oldest, None)
+    jobs_changed.notify_all()
+
+def set_job_status(folder_path, status, **fields):
+    """Record the state of a job (queued, running, completed, failed)."""
+    with jobs_lock:
+        record_job_status(folder_path, status, **fields)
 
 @contextmanager
-def managed_temp_dir():
-    with tempfile.TemporaryDirectory() as temp_dir:
+def managed_temp_dir(prefix=None):
+    """Yield a fresh temporary directory and remove its whole tree on exit."""
+    temp_dir = tempfile.mkdtemp(prefix=prefix)
+    try:
         yield temp_dir
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+UNSAFE_PATH_CHARS_RE = re.compile(r'[^\w\s\-]')
+PATH_SEPARATOR_TABLE = str.maketrans('', '', '/\\')
 
 def sanitize_path(component):
     """Sanitize a string for safe use in file paths and identifiers.
@@ -71,65 +300,183 @@ def sanitize_path(component):
     """
     if not component:
         return ''
-    component = str(component).strip()
-    component = component.replace('..', '').replace('/', '').replace('\\', '')
-    component = re.sub(r'[^\w\s\-]', '_', component)
-    return component
+    component = str(component).strip().replace('..', '').translate(PATH_SEPARATOR_TABLE)
+    return UNSAFE_PATH_CHARS_RE.sub('_', component)
 
-def upload_to_gcs(content, filepath):
+def upload_to_gcs(content, filepath, custom_metadata=None):
     """Upload a JSON-serializable object to Google Cloud Storage.
 
+    `custom_metadata`, if given, is stored as the blob's custom metadata.
+
+    The body is stored gzip-compressed with `Content-Encoding: gzip`, so
+    plain HTTP readers get it transparently decompressed by GCS. Payloads
+    larger than `UPLOAD_CHUNK_SIZE` use a chunked resumable upload.
     Returns the `gs://` path on success or raises a RuntimeError on failure.
     """
+    global last_upload_at
     try:
-        bucket = storage_client.bucket(BUCKET_NAME)
         blob = bucket.blob(filepath)
-        blob.upload_from_string(
-            json.dumps(content, ensure_ascii=False, indent=2),
-            content_type='application/json'
-        )
-        try:
-            exists = blob.exists()
-        except Exception as e:
-            print(f"Warning: could not verify blob existence for {filepath}: {e}")
-            exists = None
+        blob.content_encoding = 'gzip'
+        if custom_metadata:
+            blob.metadata = custom_metadata
+        data = gzip.compress(dumps_json(content), compresslevel=UPLOAD_GZIP_LEVEL)
+        if len(data) > UPLOAD_CHUNK_SIZE:
+            # large transcripts go up as a chunked resumable upload so a
+            # transient failure only retries the current chunk
+            blob.chunk_size = UPLOAD_CHUNK_SIZE
+            blob.upload_from_file(io.BytesIO(data), size=len(data), content_type='application/json')
+        else:
+            blob.upload_from_string(data, content_type='application/json')
+
+        # cached documents are revalidated by generation, so only the miss
+        # and listing caches need clearing for readers to see the new content
+        with missing_blobs_lock:
+            last_upload_at = time.monotonic()
+            missing_blobs.pop(filepath, None)
+        if filepath.endswith('metadata.json'):
+            transcript_list_cache.clear()
 
+        # the upload call raises on failure, so returning means the blob exists
         gcs_path = f"gs://{BUCKET_NAME}/{filepath}"
-        if exists is True:
-            print(f"Uploaded to GCS: {gcs_path}")
-        else:
-            print(f"Uploaded (verification unavailable) to GCS: {gcs_path}")
+        logger.info("Uploaded to GCS: %s", gcs_path)
 
         return gcs_path
     except Exception as e:
-        print(f"ERROR uploading to GCS: {filepath} -> {e}", file=sys.stderr)
+        logger.error("Error uploading to GCS: %s -> %s", filepath, e)
         raise RuntimeError(f"Failed to upload {filepath} to GCS: {str(e)}")
 
+def load_json_bytes(data):
+    """Parse a raw JSON blob body, gunzipping it first if it is compressed.
+
+    Raw downloads skip GCS decompressive transcoding, so blobs written by
+    `upload_to_gcs` arrive gzipped while older blobs arrive as plain JSON.
+    """
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    return orjson.loads(data)
+
+# filepath -> (generation, parsed JSON) of recently read documents, oldest first;
+# full transcripts are tens of MB once parsed, so only a handful are kept
+document_cache = OrderedDict()
+document_cache_lock = threading.Lock()
+
+def fetch_json_from_gcs(filepath):
+    """Download and parse a JSON blob, reusing the parsed copy while it is unchanged.
+
+    An uncached path costs a single GET, and a missing blob surfaces as
+    NotFound instead of an exists() probe. A cached path costs one metadata
+    GET to compare generations, trading a round trip on every hit for
+    seeing blobs rewritten by any process; the body is downloaded again only
+    when the generation changed. Entries record the generation actually
+    downloaded, so a read racing an upload cannot pass off old content as
+    new. Raises FileNotFoundError when the blob is missing so that misses
+    are never cached.
+    """
+    with document_cache_lock:
+        cached = document_cache.get(filepath)
+
+    if cached:
+        blob = bucket.get_blob(filepath)
+        if blob is None:
+            raise FileNotFoundError(filepath)
+        if blob.generation == cached[0]:
+            with document_cache_lock:
+                if filepath in document_cache:
+                    document_cache.move_to_end(filepath)
+            return cached[1]
+    else:
+        blob = bucket.blob(filepath)
+
+    try:
+        data = blob.download_as_bytes(raw_download=True)
+    except NotFound:
+        raise FileNotFoundError(filepath)
+    document = load_json_bytes(data)
+
+    # the download response carries the generation it served
+    if blob.generation is not None:
+        with document_cache_lock:
+            document_cache[filepath] = (blob.generation, document)
+            document_cache.move_to_end(filepath)
+            while len(document_cache) > GCS_DOCUMENT_CACHE_SIZE:
+                document_cache.popitem(last=False)
+    return document
+
+def listing_metadata(metadata):
+    """Return custom metadata embedding `metadata` for listings, or None if too large."""
+    # the GCS limit is in bytes, so measure before decoding non-ASCII text
+    summary = dumps_json(metadata)
+    if len(summary) > LISTING_METADATA_MAX_BYTES:
+        return None
+    return {LISTING_METADATA_KEY: summary.decode()}
+
+@lru_cache(maxsize=GCS_CACHE_SIZE)
+def fetch_json_generation(name, generation):
+    """Download and parse one immutable generation of a JSON blob.
+
+    A new upload gets a new generation, so entries never go stale and need
+    no invalidation.
+    """
+    blob = bucket.blob(name, generation=generation)
+    return load_json_bytes(blob.download_as_bytes(raw_download=True))
+
+# filepath -> monotonic deadline until which the blob is assumed missing;
+# entries are inserted with increasing deadlines, so the oldest come first
+missing_blobs = {}
+missing_blobs_lock = threading.Lock()
+# monotonic time at which this process last finished an upload
+last_upload_at = 0.0
+# 'transcripts' -> (monotonic deadline, sorted metadata list) for /list-transcripts
+transcript_list_cache = {}
+
+def remember_missing_blob(filepath, checked_at):
+    """Record a miss for `filepath` seen by a lookup that started at `checked_at`.
+
+    Nothing is recorded if an upload finished after the lookup began, so a
+    stale miss cannot hide a freshly uploaded blob. Expired entries are
+    pruned on insert and at most MISSING_BLOB_CACHE_SIZE paths are kept.
+    """
+    with missing_blobs_lock:
+        if last_upload_at >= checked_at:
+            return
+        now = time.monotonic()
+        missing_blobs.pop(filepath, None)
+        while missing_blobs:
+            oldest = next(iter(missing_blobs))
+            if missing_blobs[oldest] > now and len(missing_blobs) < MISSING_BLOB_CACHE_SIZE:
+                break
+            del missing_blobs[oldest]
+        missing_blobs[filepath] = now + MISSING_BLOB_TTL_SECONDS
+
 def get_from_gcs(filepath):
     """Fetch and parse JSON content from GCS if the blob exists.
 
     Returns the parsed object or `None` when the blob is missing or an error
-    occurs.
+    occurs. Unchanged blobs are served from an in-process cache, and misses are
+    remembered for `MISSING_BLOB_TTL_SECONDS` so polling clients do not hit
+    GCS on every request while a job is still running.
     """
+    checked_at = time.monotonic()
+    if missing_blobs.get(filepath, 0) > checked_at:
+        return None
     try:
-        bucket = storage_client.bucket(BUCKET_NAME)
-        blob = bucket.blob(filepath)
-
-        if blob.exists():
-            return json.loads(blob.download_as_text())
+        return fetch_json_from_gcs(filepath)
+    except FileNotFoundError:
+        remember_missing_blob(filepath, checked_at)
         return None
     except Exception as e:
-        print(f"Error fetching from GCS: {str(e)}", file=sys.stderr)
+        logger.error("Error fetching from GCS: %s", e)
         return None
 
 def download_youtube_audio(youtube_url, temp_dir):
     """Download the audio track for a YouTube URL into `temp_dir`.
 
     Returns the path to the downloaded WAV file, its duration in seconds,
-    and the video title. Uses `yt_dlp` + ffmpeg postprocessing.
+    and the video title. Uses `yt_dlp` + ffmpeg postprocessing, which
+    writes 16 kHz mono PCM so later stages never resample again.
     """
     output_path = os.path.join(temp_dir, "audio")
-    print(f"Downloading audio from {youtube_url}")
+    logger.info("Downloading audio from %s", youtube_url)
 
     ydl_opts = {
         'format': 'bestaudio/best',
@@ -140,8 +487,11 @@ def download_youtube_audio(youtube_url, temp_dir):
         'postprocessors': [{
             'key': 'FFmpegExtractAudio',
             'preferredcodec': 'wav',
-            'preferredquality': '192',
         }],
+        # decode straight to the 16 kHz mono PCM WhisperX consumes
+        'postprocessor_args': {
+            'extractaudio': ['-ar', '16000', '-ac', '1'],
+        },
         'http_headers': {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
                       'AppleWebKit/537.36 (KHTML, like Gecko) '
@@ -156,17 +506,23 @@ def download_youtube_audio(youtube_url, temp_dir):
 
     wav_file = output_path + ".wav"
 
-    print(f"Downloaded: {title}")
-    print(f"Audio size: {os.path.getsize(wav_file) / (1024 * 1024):.2f} MB")
-    print(f"Duration: {duration // 60} minutes {duration % 60} seconds")
+    logger.info("Downloaded: %s", title)
+    logger.info("Audio size: %.2f MB", os.path.getsize(wav_file) / (1024 * 1024))
+    logger.info("Duration: %s minutes %s seconds", duration // 60, duration % 60)
 
     return wav_file, duration, title
 
-def cleanup_old_chunk_dirs(prefix='whisperx_chunks_', max_age_seconds=60):
+# Chunk dirs owned by running jobs; the sweep never touches these
+active_chunk_dirs = set()
+CLEANUP_INTERVAL_SECONDS = 600
+cleanup_thread_lock = threading.Lock()
+cleanup_thread = None
+
+def cleanup_old_chunk_dirs(prefix='whisperx_chunks_', max_age_seconds=3600):
     """Remove stale temporary chunk directories older than `max_age_seconds`.
 
     This helps keep /tmp from filling up when previous runs crashed or left
-    artifacts behind.
+    artifacts behind. Directories in `active_chunk_dirs` are skipped.
     """
     tmp_root = tempfile.gettempdir()
     now = time.time()
@@ -175,6 +531,8 @@ def cleanup_old_chunk_dirs(prefix='whisperx_chunks_', max_age_seconds=60):
             if not name.startswith(prefix):
                 continue
             path = os.path.join(tmp_root, name)
+            if path in active_chunk_dirs:
+                continue
             try:
                 mtime = os.path.getmtime(path)
             except Exception:
@@ -183,284 +541,489 @@ def cleanup_old_chunk_dirs(prefix='whisperx_chunks_', max_age_seconds=60):
             if age > max_age_seconds and os.path.isdir(path):
                 try:
                     shutil.rmtree(path)
-                    print(f"Removed stale chunk dir: {path}")
+                    logger.info("Removed stale chunk dir: %s", path)
                 except Exception as e:
-                    print(f"Failed to remove stale chunk dir {path}: {e}")
+                    logger.warning("Failed to remove stale chunk dir %s: %s", path, e)
     except Exception as e:
-        print(f"Error during stale chunk dir cleanup: {e}")
+        logger.error("Error during stale chunk dir cleanup: %s", e)
 
-def split_audio(audio_path, chunk_length_ms=CHUNK_LENGTH_MS):
-    """Split a long audio file into WAV chunks suitable for WhisperX.
+def start_cleanup_thread():
+    """Start the daemon thread that sweeps stale chunk dirs, once per process.
 
-    Returns (chunks, temp_dir) where `chunks` is a list of
-    (path, start_sec, end_sec) tuples and `temp_dir` is the directory
-    containing the created chunk files (caller is responsible for cleanup).
+    Started on first use rather than at import so it always runs in the
+    serving process, whether or not the app was preloaded before a fork.
     """
-    # clean up any stale chunk dirs before creating a fresh one
-    cleanup_old_chunk_dirs()
-    temp_dir = tempfile.mkdtemp(prefix="whisperx_chunks_")
-    print(f"Splitting audio into {chunk_length_ms/60000:.1f}-min chunks into {temp_dir}")
+    global cleanup_thread
+    with cleanup_thread_lock:
+        if cleanup_thread is not None:
+            return
 
+        def sweep():
+            while True:
+                cleanup_old_chunk_dirs()
+                time.sleep(CLEANUP_INTERVAL_SECONDS)
+
+        cleanup_thread = threading.Thread(target=sweep, name='chunk-dir-cleanup', daemon=True)
+        cleanup_thread.start()
+
+def probe_duration(audio_path):
+    """Return the duration of `audio_path` in seconds using ffprobe.
+
+    Only used when yt-dlp did not report a duration for the download.
+    """
     try:
         result = subprocess.run([
-            'ffprobe', '-v', 'error', '-show_entries', 
-            'format=duration', '-of', 
-            'default=noprint_wrappers=1:nokey=1', audio_path
-        ], capture_output=True, text=True, check=True)
-        
-        total_duration = float(result.stdout.strip()) * 1000
+            'ffprobe', '-v', 'error', '-show_entries',
+            'format=duration', '-of', 'json', audio_path
+        ], capture_output=True, check=True)
+
+        return float(orjson.loads(result.stdout)['format']['duration'])
     except Exception as e:
-        # clean up temp_dir on failure to avoid leaving junk behind
-        try:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-                print(f"Cleaned up chunk temp dir after failure: {temp_dir}")
-        except Exception:
-            pass
         raise RuntimeError(f"ffprobe failed: {e}")
 
-    num_chunks = math.ceil(total_duration / chunk_length_ms)
-    print(f"Total duration: {total_duration/1000:.1f}s ({num_chunks} chunks expected)")
+def find_split_points(audio_path, total_duration_sec, chunk_length_ms=CHUNK_LENGTH_MS):
+    """Pick chunk boundaries that fall in silent gaps near each target cut.
+
+    Runs ffmpeg `silencedetect` once over the file and, for every multiple
+    of the chunk length, moves the cut to the middle of the closest silence
+    within `SILENCE_SEARCH_WINDOW_SECONDS`. Falls back to the fixed target
+    when no silence is close enough, so speakers are not cut mid-word.
+    """
+    result = subprocess.run([
+        'ffmpeg', '-hide_banner', '-nostats',
+        '-i', audio_path,
+        '-vn',
+        '-af', 'silencedetect=n=-30dB:d=0.5',
+        '-f', 'null', '-'
+    ], capture_output=True, text=True, check=True)
+
+    starts = [float(v) for v in re.findall(r'silence_start: (-?[\d.]+)', result.stderr)]
+    ends = [float(v) for v in re.findall(r'silence_end: ([\d.]+)', result.stderr)]
+    silences = [(start + end) / 2 for start, end in zip(starts, ends)]
+
+    chunk_length_sec = chunk_length_ms / 1000
+    split_points = []
+    target = chunk_length_sec
+    while target < total_duration_sec:
+        nearest = min(silences, key=lambda t: abs(t - target), default=None)
+        if nearest is not None and abs(nearest - target) <= SILENCE_SEARCH_WINDOW_SECONDS:
+            split_points.append(nearest)
+        else:
+            split_points.append(target)
+        target += chunk_length_sec
+
+    logger.info("Found %s silent gaps; split points: %s", len(silences), [round(p, 1) for p in split_points])
+    return split_points
+
+def is_whisper_ready_wav(audio_path):
+    """Return True if `audio_path` is already 16 kHz mono 16-bit PCM WAV.
+
+    Reads only the RIFF header; anything the `wave` module cannot parse is
+    treated as needing conversion.
+    """
+    try:
+        with wave.open(audio_path, 'rb') as wav:
+            return wav.getframerate() == 16000 and wav.getnchannels() == 1 and wav.getsampwidth() == 2
+    except (wave.Error, EOFError, OSError):
+        return False
+
+def split_audio(audio_path, temp_dir, split_points=None, chunk_length_ms=CHUNK_LENGTH_MS):
+    """Split a long audio file into WAV chunks suitable for WhisperX.
+
+    Generator yielding (path, start_sec, end_sec) tuples as soon as ffmpeg
+    finishes writing each chunk into `temp_dir`, so callers can transcribe
+    chunk N while ffmpeg is still producing chunk N+1. Chunks are cut at
+    `split_points` (seconds) when given, otherwise every `chunk_length_ms`.
+    The caller owns `temp_dir` and is responsible for cleanup.
+    """
+    logger.info("Splitting audio into %.1f-min chunks into %s", chunk_length_ms/60000, temp_dir)
+
+    if split_points:
+        segment_args = ['-segment_times', ','.join(f"{t:.3f}" for t in split_points)]
+    else:
+        segment_args = ['-segment_time', str(chunk_length_ms / 1000)]
+
+    # downloads are already extracted at 16 kHz mono, so those are cut with a
+    # stream copy instead of going through the resampler again
+    if is_whisper_ready_wav(audio_path):
+        codec_args = ['-c', 'copy']
+    else:
+        codec_args = ['-ar', '16000', '-ac', '1', '-acodec', 'pcm_s16le']
+
+    # one decode pass: the segment muxer writes every chunk from a single ffmpeg
+    # run and reports each finished chunk on stdout as "name,start,end"
+    proc = subprocess.Popen([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-i', audio_path,
+        *codec_args,
+        '-f', 'segment',
+        *segment_args,
+        '-reset_timestamps', '1',
+        '-segment_list', 'pipe:1',
+        '-segment_list_type', 'csv',
+        os.path.join(temp_dir, 'chunk_%03d.wav')
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
 
-    chunks = []
     MIN_CHUNK_DURATION_SECONDS = 30
+    created = 0
 
-    for i in range(num_chunks):
-        start_ms = i * chunk_length_ms
-        end_ms = min(start_ms + chunk_length_ms, total_duration)
-        chunk_duration_sec = (end_ms - start_ms) / 1000
+    try:
+        for line in proc.stdout:
+            name, start, end = line.strip().rsplit(',', 2)
+            out_path = os.path.join(temp_dir, name)
+            start_sec, end_sec = float(start), float(end)
+
+            if end_sec - start_sec < MIN_CHUNK_DURATION_SECONDS:
+                logger.debug("Skipping %s: too short (%.1fs)", name, end_sec - start_sec)
+                os.remove(out_path)
+                continue
 
-        if chunk_duration_sec < MIN_CHUNK_DURATION_SECONDS:
-            print(f"   Skipping chunk {i}: too short ({chunk_duration_sec:.1f}s)")
-            continue
+            created += 1
+            logger.debug("%s: %.1fs → %.1fs", name, start_sec, end_sec)
+            yield out_path, start_sec, end_sec
 
-        out_path = os.path.join(temp_dir, f"chunk_{i:03d}.wav")
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg segmenting failed: {proc.stderr.read().strip()}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
 
-        try:
-            subprocess.run([
-                'ffmpeg', '-y',
-                '-i', audio_path,
-                '-ss', str(start_ms / 1000),
-                '-t', str(chunk_duration_sec),
-                '-ar', '16000',
-                '-ac', '1',
-                '-acodec', 'pcm_s16le',
-                out_path
-            ], check=True, capture_output=True)
-            
-            chunks.append((out_path, start_ms / 1000, end_ms / 1000))
-            print(f"   Chunk {i}: {start_ms/1000:.1f}s → {end_ms/1000:.1f}s")
-        except Exception as e:
-            print(f"   Error creating chunk {i}: {e}")
-    
-    print(f"Created {len(chunks)}/{num_chunks} chunks successfully.")
-    # return both the chunk list and the temp directory so callers can clean up
-    return chunks, temp_dir
+    logger.info("Created %s chunks successfully.", created)
 
-def transcribe_audio_chunks(audio_path, offset_seconds=0):
+def transcribe_audio_chunks(audio_path, offset_seconds=0, align=True):
     """Transcribe and align a single audio chunk using WhisperX.
 
     Returns (adjusted_segments, full_text) where segments timestamps are
     offset by `offset_seconds` so they can be merged into a global timeline.
+    With `align=False` word-level alignment is skipped and segments carry
+    no `words`.
+
+    The model is loaded with `condition_on_previous_text=False`, so each
+    window is decoded without the previous window's text as a prompt. This
+    lets windows batch on the GPU and avoids repetition loops on long
+    hearings, at the cost of slightly less consistent spelling of names and
+    terms across window boundaries.
     """
-    print(f"Transcribing chunk: {os.path.basename(audio_path)} (offset: {offset_seconds/60:.1f} min)")
-
-    try:
-        result = model.transcribe(
-            audio_path,
-            language='en',
-            verbose=False,
-            print_progress=True,
-            batch_size=16,
-        )
-        print(f"Transcription finished for chunk: {os.path.basename(audio_path)}")
-    except Exception as e:
-        print(f"Error transcribing chunk {audio_path}: {e}")
-        return [], ""
+    logger.debug("Transcribing chunk: %s (offset: %.1f min)", os.path.basename(audio_path), offset_seconds/60)
 
+    # decode once, before taking a replica, and share the samples between
+    # transcription and alignment instead of each re-reading the file
     try:
-        # run alignment
-        result_aligned = whisperx.align(
-            result["segments"],
-            alignment_model,
-            metadata,
-            audio_path,
-            DEVICE
-        )
-        print(f"Alignment finished for chunk: {os.path.basename(audio_path)}")
+        audio = whisperx.load_audio(audio_path)
     except Exception as e:
-        print(f"Error aligning chunk {audio_path}: {e}")
+        logger.error("Error loading audio %s: %s", audio_path, e)
         return [], ""
 
-    # adjust timestamps w/ offset
-    adjusted_segments = []
+    # inference_mode is thread-local, so it is entered here on the worker
+    # thread; it skips autograd bookkeeping in the VAD and alignment models
+    with acquire_replica() as replica, torch.inference_mode():
+        try:
+            result = replica['model'].transcribe(
+                audio,
+                language='en',
+                verbose=False,
+                print_progress=True,
+                batch_size=BATCH_SIZE,
+            )
+            logger.debug("Transcription finished for chunk: %s on %s", os.path.basename(audio_path), replica['device'])
+        except Exception as e:
+            logger.error("Error transcribing chunk %s: %s", audio_path, e)
+            return [], ""
 
-    # for each segment, adjust it and append words
-    for idx, segment in enumerate(result_aligned.get('segments', [])):
-        adjusted_segment = {
+        if not align:
+            result_aligned = result
+        else:
+            try:
+                # run alignment on the same samples; wav2vec2 is fp32 by default,
+                # so let its convolutions and matmuls use fp16 tensor cores on GPU
+                with torch.autocast(device_type='cuda', dtype=torch.float16, enabled=DEVICE == 'cuda'):
+                    result_aligned = whisperx.align(
+                        result["segments"],
+                        replica['alignment_model'],
+                        replica['metadata'],
+                        audio,
+                        replica['device']
+                    )
+                logger.debug("Alignment finished for chunk: %s", os.path.basename(audio_path))
+            except Exception as e:
+                logger.error("Error aligning chunk %s: %s", audio_path, e)
+                return [], ""
+
+    # adjust timestamps w/ offset; alignment returns numpy.float64 values,
+    # so cast them back to plain floats for the merged transcript
+    offset = offset_seconds
+    adjusted_segments = [
+        {
             'id': segment.get('id', idx),
-            'start': segment.get('start', 0) + offset_seconds,
-            'end': segment.get('end', 0) + offset_seconds,
+            'start': float(segment.get('start', 0) + offset),
+            'end': float(segment.get('end', 0) + offset),
             'text': segment.get('text', '').strip(),
-            'words': []
+            'words': [
+                {
+                    'word': word.get('word', ''),
+                    'start': float(word.get('start', 0) + offset),
+                    'end': float(word.get('end', 0) + offset),
+                }
+                for word in segment.get('words', ())
+            ],
         }
-        for word in segment.get('words', []):
-            adjusted_segment['words'].append({
-                'word': word.get('word', ''),
-                'start': word.get('start', 0) + offset_seconds,
-                'end': word.get('end', 0) + offset_seconds,
-            })
-
-        adjusted_segments.append(adjusted_segment)
+        for idx, segment in enumerate(result_aligned.get('segments', ()))
+    ]
 
     # Build full text from all segments
-    full_text = " ".join(seg['text'] for seg in adjusted_segments if seg.get('text')).strip()
+    # normalized here so merging chunks is a plain join
+    full_text = " ".join(" ".join(seg['text'] for seg in adjusted_segments).split())
 
-    print(f"Chunk {os.path.basename(audio_path)} processed — segments: {len(adjusted_segments)}")
+    logger.debug("Chunk %s processed — segments: %s", os.path.basename(audio_path), len(adjusted_segments))
     return adjusted_segments, full_text
 
-def transcribe_full_audio(audio_path, progress_callback=None):
+# settings that change decoded text; results cached under other values are
+# never reused, so changing a setting cannot silently serve stale output
+DECODE_CONFIG_KEY = hashlib.blake2b(
+    orjson.dumps({'compute_type': COMPUTE_TYPE, 'asr_options': ASR_OPTIONS}, option=orjson.OPT_SORT_KEYS),
+    digest_size=8,
+).hexdigest()
+
+def chunk_cache_path(chunk_path, offset_seconds, align=True):
+    """Return the GCS path caching results for this chunk's audio and offset.
+
+    The path is scoped by model and DECODE_CONFIG_KEY, so results decoded
+    with a different compute type or ASR options are never reused.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(chunk_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    model_key = MODEL_NAME.replace('/', '_')
+    suffix = '' if align else '_noalign'
+    return f"{CHUNK_CACHE_PREFIX}/{model_key}/{DECODE_CONFIG_KEY}/{digest.hexdigest()}_{offset_seconds:.3f}{suffix}.json"
+
+def transcribe_chunk_cached(chunk_path, offset_seconds=0, align=True):
+    """`transcribe_audio_chunks` with results reused from CHUNK_CACHE_PREFIX.
+
+    Cache entries are keyed by a hash of the chunk audio, its offset, the
+    model and the decoding settings, so a retried job only transcribes
+    chunks that never finished.
+    Cache failures are logged and never fail the job.
+    """
+    if not CHUNK_CACHE_PREFIX:
+        return transcribe_audio_chunks(chunk_path, offset_seconds=offset_seconds, align=align)
+
+    blob = bucket.blob(chunk_cache_path(chunk_path, offset_seconds, align))
+    try:
+        cached = orjson.loads(blob.download_as_bytes(raw_download=True))
+        logger.info("Reusing cached result for chunk %s", os.path.basename(chunk_path))
+        return cached['segments'], cached['text']
+    except NotFound:
+        pass
+    except Exception as e:
+        logger.warning("Failed to read chunk cache %s: %s", blob.name, e)
+
+    segments, text = transcribe_audio_chunks(chunk_path, offset_seconds=offset_seconds, align=align)
+    if segments:
+        try:
+            blob.upload_from_string(dumps_json({'segments': segments, 'text': text}), content_type='application/json')
+        except Exception as e:
+            logger.warning("Failed to write chunk cache %s: %s", blob.name, e)
+    return segments, text
+
+def transcribe_full_audio(audio_path, total_duration_sec=None, progress_callback=None, align=True):
     """Transcribe a full audio file by splitting into chunks and processing
-    them sequentially. Returns (sorted_segments, full_text).
+    them across the loaded model replicas. Returns (sorted_segments, full_text)
+    and raises RuntimeError if no segments were produced at all.
+
+    Chunks are queued as ffmpeg emits them, so splitting overlaps with GPU
+    inference instead of running ahead of it. With one replica (single GPU
+    or CPU) chunks are processed sequentially.
+
+    `total_duration_sec` should be passed when already known (yt-dlp
+    reports it) to avoid an ffprobe run.
+
+    With a single replica, audio no longer than SINGLE_PASS_MAX_SECONDS
+    skips the ffmpeg split entirely: WhisperX VAD-cuts and batches the
+    whole file, so external chunks would only add boundaries and idle
+    time between calls.
     """
-    chunks, temp_dir = split_audio(audio_path)
+    if not total_duration_sec:
+        total_duration_sec = probe_duration(audio_path)
+
+    if len(replicas) == 1 and total_duration_sec <= SINGLE_PASS_MAX_SECONDS:
+        logger.info("Starting single-pass transcription (%.1f min)", total_duration_sec / 60)
+        segments, text = transcribe_chunk_cached(audio_path, align=align)
+        # chunk errors are logged and swallowed as empty results; in a single
+        # pass that is the whole hearing, so fail the job instead of
+        # uploading an empty transcript over a good one
+        if not segments:
+            raise RuntimeError(f"Single-pass transcription produced no segments for {total_duration_sec:.0f}s of audio")
+        for idx, segment in enumerate(segments):
+            segment['id'] = idx
+        if progress_callback:
+            progress_callback("1/1...")
+        return segments, text
+
+    total_chunks = max(1, math.ceil(total_duration_sec * 1000 / CHUNK_LENGTH_MS))
+
+    split_points = None
+    if SPLIT_ON_SILENCE and total_chunks > 1:
+        try:
+            split_points = find_split_points(audio_path, total_duration_sec)
+        except Exception as e:
+            logger.warning("Silence detection failed, using fixed chunk boundaries: %s", e)
+
     all_segments = []
     all_text_parts = []
 
-    total_chunks = len(chunks)
     completed_chunks = 0
 
-    print(f"Starting transcription: {total_chunks} chunk(s)")
-
-    try:
-        for index, (chunk_path, start_sec, end_sec) in enumerate(chunks):
-            if progress_callback:
-                progress_callback(f"{index + 1}/{total_chunks}...")
-
-            print(f"\nProcessing chunk {index + 1}/{total_chunks} — {os.path.basename(chunk_path)}")
+    logger.info("Starting transcription: %s chunk(s) expected on %s replica(s)", total_chunks, len(replicas))
 
+    def process_chunk(chunk_path, start_sec):
+        try:
+            return transcribe_chunk_cached(chunk_path, offset_seconds=start_sec, align=align)
+        finally:
+            # remove per-chunk file
             try:
-                segments, text = transcribe_audio_chunks(chunk_path, offset_seconds=start_sec)
-                if segments:
-                    all_segments.extend(segments)
-                if text:
-                    all_text_parts.append(text)
-            except Exception as e:
-                print(f"Failed processing chunk {chunk_path}: {e}")
+                if os.path.exists(chunk_path):
+                    os.remove(chunk_path)
+                    logger.debug("Removed temporary chunk file: %s", chunk_path)
+            except Exception:
+                logger.warning("Failed to remove temporary chunk file: %s", chunk_path)
 
-            # remove per-chunk file
-            if temp_dir and chunk_path.startswith(temp_dir):
-                try:
-                    if os.path.exists(chunk_path):
-                        os.remove(chunk_path)
-                        print(f"Removed temporary chunk file: {chunk_path}")
-                except Exception:
-                    print(f"Failed to remove temporary chunk file: {chunk_path}")
-
-            completed_chunks += 1
-            print(f"[Progress] {completed_chunks}/{total_chunks} chunks completed")
-    finally:
-        # Ensure the chunk directory is removed after processing
+    # the chunk directory is removed as a whole on exit; anything left behind
+    # by a crash is picked up by the background sweep
+    with managed_temp_dir(prefix="whisperx_chunks_") as temp_dir:
+        active_chunk_dirs.add(temp_dir)
         try:
-            if temp_dir and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-                print(f"Removed temporary chunk directory: {temp_dir}")
-        except Exception as e:
-            print(f"Failed to remove temporary chunk directory {temp_dir}: {e}")
+            # chunks are independent, so fan them out across replicas; results
+            # are collected in submission order to keep the timeline ordered
+            with ThreadPoolExecutor(max_workers=len(replicas)) as executor:
+                futures = []
+                for index, (chunk_path, start_sec, end_sec) in enumerate(split_audio(audio_path, temp_dir, split_points)):
+                    logger.debug("Queued chunk %s/%s — %s", index + 1, total_chunks, os.path.basename(chunk_path))
+                    futures.append((chunk_path, executor.submit(process_chunk, chunk_path, start_sec)))
+
+                for chunk_path, future in futures:
+                    try:
+                        segments, text = future.result()
+                        if segments:
+                            all_segments.extend(segments)
+                        if text:
+                            all_text_parts.append(text)
+                    except Exception as e:
+                        logger.error("Failed processing chunk %s: %s", chunk_path, e)
+
+                    completed_chunks += 1
+                    if progress_callback:
+                        progress_callback(f"{completed_chunks}/{len(futures)}...")
+                    logger.info("[Progress] %s/%s chunks completed", completed_chunks, len(futures))
+        finally:
+            active_chunk_dirs.discard(temp_dir)
 
-        # also try to remove any other stale chunk dirs promptly
-        cleanup_old_chunk_dirs()
+    if not all_segments:
+        raise RuntimeError(f"Transcription produced no segments for {total_duration_sec:.0f}s of audio")
 
-    sorted_segments = sorted(all_segments, key=lambda s: s.get('start', 0))
+    # futures are drained in chunk order and chunks do not overlap, so the
+    # merged list is already in timeline order
+    sorted_segments = all_segments
     for idx, segment in enumerate(sorted_segments):
         segment['id'] = idx
 
+    # chunk texts are already whitespace-normalized and non-empty
     full_text = " ".join(all_text_parts)
-    full_text = re.sub(r'\s+', ' ', full_text).strip()
 
-    print(f"Full transcription completed, total segments: {len(sorted_segments)}")
+    logger.info("Full transcription completed, total segments: %s", len(sorted_segments))
     return sorted_segments, full_text
 
-def run_transcription_job(job_id, youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids):
+def run_transcription_job(folder_path, committee_slug, youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids, progress_callback=None, align=True):
     """Run an end-to-end transcription job: download, transcribe, upload.
 
-    Returns (metadata, transcript, folder_path) on success. Caller should
-    handle exceptions and cleanup is performed in the finally block.
+    `folder_path` and `committee_slug` are derived once by the caller from
+    the sanitized request fields. Returns (metadata, transcript, folder_path)
+    on success. Caller should handle exceptions; temporary files are
+    removed either way.
     """
-    temp_dir = tempfile.mkdtemp()
     try:
-        audio_path, duration, title = download_youtube_audio(youtube_url, temp_dir)
-
-        start_time = datetime.now()
-        segments, full_text = transcribe_full_audio(audio_path)
-        processing_time = (datetime.now() - start_time).total_seconds()
-        committee_slug = '-'.join([sanitize_path(c).replace(' ', '').upper() for c in committee_list]) if committee_list else 'UNKNOWN'
-        hearing_id = f"{year}_{committee_slug}_{bill_name}_{video_title}"
-        folder_path = f"{year}/{committee_slug}/{bill_name}/{video_title}".replace(' ', '_')
-
-        metadata = {
-            'hearing_id': hearing_id,
-            'title': title,
-            'date': hearing_date,
-            'duration': duration,
-            'youtube_url': youtube_url,
-            'year': year,
-            'committee': committee_list,
-            'bill_name': bill_name,
-            'bill_ids': bill_ids,
-            'video_title': video_title,
-            'room': room,
-            'ampm': ampm,
-            'folder_path': folder_path,
-            'created_at': datetime.now().isoformat(),
-        }
-
-        transcript = {
-            'hearing_id': hearing_id,
-            'text': full_text,
-            'language': 'en',
-            'duration': duration,
-            'processing_time': processing_time,
-            'model': MODEL_NAME,
-            'segments': segments if segments else [],
-            'total_segments': len(segments),
-            'created_at': datetime.now().isoformat(),
-        }
-
-        metadata_gcs = upload_to_gcs(metadata, f"{folder_path}/metadata.json")
-        transcript_gcs = upload_to_gcs(transcript, f"{folder_path}/transcript.json")
-
-        print(f"run_transcription_job: metadata_gcs={metadata_gcs}, transcript_gcs={transcript_gcs}")
-
-        return metadata, transcript, folder_path
-    except Exception as e:
-        raise e
+        # the download dir is removed as a whole on exit
+        with managed_temp_dir() as temp_dir:
+            audio_path, duration, title = download_youtube_audio(youtube_url, temp_dir)
+
+            start_time = datetime.now()
+            segments, full_text = transcribe_full_audio(audio_path, duration, progress_callback, align=align)
+            processing_time = (datetime.now() - start_time).total_seconds()
+            hearing_id = f"{year}_{committee_slug}_{bill_name}_{video_title}"
+
+            metadata = {
+                'hearing_id': hearing_id,
+                'title': title,
+                'date': hearing_date,
+                'duration': duration,
+                'youtube_url': youtube_url,
+                'year': year,
+                'committee': committee_list,
+                'bill_name': bill_name,
+                'bill_ids': bill_ids,
+                'video_title': video_title,
+                'room': room,
+                'ampm': ampm,
+                'folder_path': folder_path,
+                'created_at': datetime.now().isoformat(),
+            }
+
+            transcript = {
+                'hearing_id': hearing_id,
+                'text': full_text,
+                'language': 'en',
+                'duration': duration,
+                'processing_time': processing_time,
+                'model': MODEL_NAME,
+                'segments': segments if segments else [],
+                'total_segments': len(segments),
+                'word_timestamps': align,
+                'created_at': datetime.now().isoformat(),
+            }
+
+            # serialize and upload both blobs concurrently; the job waits so its
+            # status only turns completed once the transcript is readable
+            transcript_future = upload_executor.submit(upload_to_gcs, transcript, f"{folder_path}/transcript.json")
+            metadata_future = upload_executor.submit(
+                upload_to_gcs, metadata, f"{folder_path}/metadata.json", listing_metadata(metadata)
+            )
+            transcript_gcs = transcript_future.result()
+            metadata_gcs = metadata_future.result()
+
+            logger.info("run_transcription_job: metadata_gcs=%s, transcript_gcs=%s", metadata_gcs, transcript_gcs)
+
+            return metadata, transcript, folder_path
     finally:
-        try:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
-                print(f"Cleaned up download temp dir: {temp_dir}")
-        except Exception as e:
-            print(f"Failed to remove download temp dir {temp_dir}: {e}")
-
-        # also try to remove any other stale chunk dirs promptly
-        cleanup_old_chunk_dirs()
+        # hand cached blocks from this job's VAD/alignment activations back
+        # to the driver so a long-running worker does not creep toward OOM
+        if DEVICE == "cuda":
+            torch.cuda.empty_cache()
 
 
-def background_transcribe(youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids):
-    """Wrapper to run `run_transcription_job` in a background thread.
+def background_transcribe(job_path, committee_slug, youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids, align=True):
+    """Run `run_transcription_job` on the job pool, tracking its status.
 
-    The function intentionally does not store in-process job state; the
-    frontend is expected to poll the transcript endpoint for completion.
+    Status lives in this process only and is keyed by folder path; the
+    transcript in GCS remains the durable signal of completion.
     """
+    set_job_status(job_path, 'running')
+
+    def report_progress(progress):
+        set_job_status(job_path, 'running', progress=progress)
+
     try:
         metadata, transcript, folder_path = run_transcription_job(
-            None, youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids
+            job_path, committee_slug, youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids,
+            progress_callback=report_progress, align=align
         )
-        print(f"Background transcription completed for folder: {folder_path}")
+        set_job_status(job_path, 'completed')
+        logger.info("Background transcription completed for folder: %s", folder_path)
     except Exception as e:
-        print(f"Background transcription failed: {e}", file=sys.stderr)
-    
+        set_job_status(job_path, 'failed', error=str(e))
+        logger.error("Background transcription failed: %s", e)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health endpoint returning basic runtime info for monitoring.
@@ -471,8 +1034,11 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'model': MODEL_NAME,
+        'compute_type': COMPUTE_TYPE,
+        'replicas': len(replicas),
         'gcs_bucket': BUCKET_NAME,
         'chunk_length_minutes': CHUNK_LENGTH_MS / 1000 / 60,
+        'batch_size': BATCH_SIZE,
     })
 
 @app.route('/transcribe', methods=['POST'])
@@ -480,8 +1046,10 @@ def transcribe():
     """Start a transcription job.
 
     This endpoint accepts JSON payloads describing the hearing and starts a
-    background transcription worker; it returns a 202 with the expected
-    `folder_path` that can be polled for completion.
+    background transcription job; it returns a 202 with the expected
+    `folder_path`, whose progress can be polled at /transcribe/status.
+    Resubmitting a job that is still queued or running returns the same
+    202 response, and 429 is returned once MAX_PENDING_JOBS are pending.
     """
     data = request.json
     youtube_url = data.get('youtube_url')
@@ -497,6 +1065,8 @@ def transcribe():
     room = sanitize_path(data.get('room', ''))
     ampm = sanitize_path(data.get('ampm', ''))
     bill_ids = data.get('bill_ids', [])
+    # word-level alignment can be skipped when only segment text is needed
+    align = data.get('align', True) not in (False, 0, 'false', '0')
 
     # validate all fields
     if not all([youtube_url, year, committee_list, bill_name, video_title, hearing_date]):
@@ -505,13 +1075,42 @@ def transcribe():
             'required': ['youtube_url', 'year', 'committee', 'bill_name', 'video_title', 'hearing_date']
         }), 400
     
-    committee_slug = '-'.join([sanitize_path(c).replace(' ', '').upper() for c in committee_list]) if committee_list else 'UNKNOWN'
+    # committee names are already sanitized above; build the slug and path
+    # once here and hand them to the job instead of re-deriving them
+    committee_slug = '-'.join(c.replace(' ', '').upper() for c in committee_list)
     folder_path = f"{year}/{committee_slug}/{bill_name}/{video_title}".replace(' ', '_')
 
-    def run_in_background():
-        background_transcribe(youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids)
+    # check and claim under one lock so concurrent duplicates queue only once
+    with jobs_lock:
+        existing = jobs.get(folder_path)
+        if existing and existing['status'] in PENDING_STATUSES:
+            # always answer 'queued' like a fresh submission so clients need
+            # no extra case; the live state is reported as `job_status`
+            return jsonify({
+                **existing,
+                'status': 'queued',
+                'job_status': existing['status'],
+                'message': 'Transcription already in progress',
+            }), 202
+        if pending_jobs >= MAX_PENDING_JOBS:
+            return jsonify({
+                'error': 'Too many transcriptions in progress, retry later',
+                'pending': pending_jobs,
+            }), 429, {'Retry-After': '60'}
+        # a resubmitted job starts over without the previous run's fields
+        jobs.pop(folder_path, None)
+        record_job_status(folder_path, 'queued')
 
-    threading.Thread(target=run_in_background, daemon=True).start()
+    try:
+        start_cleanup_thread()
+        job_executor.submit(
+            background_transcribe, folder_path, committee_slug, youtube_url, year, committee_list, bill_name, video_title, hearing_date, room, ampm, bill_ids, align
+        )
+    except Exception as e:
+        # e.g. the executor is shut down during a worker restart; release the
+        # claim so the job neither blocks resubmits nor holds a pending slot
+        set_job_status(folder_path, 'failed', error=str(e))
+        raise
 
     return jsonify({
         'status': 'queued',
@@ -519,6 +1118,64 @@ def transcribe():
         'folder_path': folder_path
     }), 202
 
+@app.route('/transcribe/status/<path:folder_path>', methods=['GET'])
+def transcribe_status(folder_path):
+    """Return the in-process status of a job submitted to this worker.
+
+    Returns 404 for unknown jobs, e.g. after a restart; callers should then
+    fall back to the transcript endpoint.
+    """
+    with jobs_lock:
+        job = dict(jobs.get(folder_path) or {})
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/transcribe/stream/<path:folder_path>', methods=['GET'])
+def transcribe_stream(folder_path):
+    """Stream a job's status as server-sent events until it finishes.
+
+    Sends the current status immediately, then one event per change, with
+    keep-alive comments in between. Each open stream holds a server
+    thread, so at most MAX_EVENT_STREAMS run at once (503 past that), and
+    each is closed after SSE_MAX_STREAM_SECONDS for the client to reconnect.
+    """
+    with jobs_lock:
+        if folder_path not in jobs:
+            return jsonify({'error': 'Job not found'}), 404
+    if not event_stream_slots.acquire(blocking=False):
+        return jsonify({
+            'error': 'Too many open status streams, poll /transcribe/status instead',
+        }), 503, {'Retry-After': str(SSE_KEEPALIVE_SECONDS)}
+
+    def generate():
+        last_update = None
+        deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            with jobs_changed:
+                jobs_changed.wait_for(
+                    lambda: jobs.get(folder_path, {}).get('updated_at') != last_update,
+                    timeout=min(SSE_KEEPALIVE_SECONDS, remaining),
+                )
+                job = dict(jobs.get(folder_path) or {})
+            if not job:
+                return
+            if job['updated_at'] == last_update:
+                yield ": keep-alive\n\n"
+                continue
+            last_update = job['updated_at']
+            yield f"data: {app.json.dumps(job)}\n\n"
+            if job['status'] in FINISHED_STATUSES:
+                return
+
+    response = Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    # the server closes the response even if the generator never started
+    response.call_on_close(event_stream_slots.release)
+    return response
+
 @app.route('/transcript/<path:folder_path>', methods=['GET'])
 def get_transcript(folder_path):
     """Fetch metadata and transcript JSON for a given folder path.
@@ -532,10 +1189,14 @@ def get_transcript(folder_path):
         metadata_path = f"{folder_path}/metadata.json"
         transcript_path = f"{folder_path}/transcript.json"
 
-        metadata = get_from_gcs(metadata_path)
+        # the transcript is the large payload and the one still missing while a
+        # job runs, so probe it first and skip the metadata fetch on a miss
         transcript = get_from_gcs(transcript_path)
+        if not transcript:
+            return jsonify({'error': 'Transcript not found'}), 404
 
-        if not metadata or not transcript:
+        metadata = get_from_gcs(metadata_path)
+        if not metadata:
             return jsonify({'error': 'Transcript not found'}), 404
 
         return jsonify({
@@ -554,28 +1215,46 @@ def get_transcript(folder_path):
 def list_transcripts():
     """List available transcripts by reading metadata blobs from GCS.
 
-    Returns a list of metadata objects sorted by date (newest first).
+    Returns a list of metadata objects sorted by date (newest first). The
+    result is reused for LIST_CACHE_TTL_SECONDS, or until a new metadata
+    blob is uploaded by this process.
     """
     try:
-        bucket = storage_client.bucket(BUCKET_NAME)
-        blobs = bucket.list_blobs(max_results=1000)
-        transcripts = []
-        seen_folders = set()
+        cached = transcript_list_cache.get('transcripts')
+        if cached and cached[0] > time.monotonic():
+            return jsonify({'transcripts': cached[1], 'count': len(cached[1])})
+
+        # filter server-side and ask only for name, generation and custom
+        # metadata, so listing pages skip transcript blobs and other fields
+        metadata_blobs = list(bucket.list_blobs(
+            match_glob='**/metadata.json',
+            fields='items(name,generation,metadata),nextPageToken',
+            max_results=1000,
+        ))
+
+        def read_metadata(blob):
+            try:
+                # blobs written with a listing copy need no download at all
+                summary = (blob.metadata or {}).get(LISTING_METADATA_KEY)
+                if summary:
+                    return orjson.loads(summary)
+                # older blobs: unchanged ones are served from memory
+                return fetch_json_generation(blob.name, blob.generation)
+            except Exception as e:
+                logger.warning("Failed to read metadata blob %s: %s", blob.name, e)
+                return None
 
-        for blob in blobs:
-            if blob.name.endswith('metadata.json'):
-                folder_path = blob.name.replace('/metadata.json', '')
+        transcripts = []
+        if metadata_blobs:
+            # downloads are network-bound, so overlap them instead of fetching serially
+            with ThreadPoolExecutor(max_workers=min(LIST_FETCH_WORKERS, len(metadata_blobs))) as executor:
+                transcripts = [m for m in executor.map(read_metadata, metadata_blobs) if m is not None]
 
-                if folder_path not in seen_folders:
-                    seen_folders.add(folder_path)
-                    try:
-                        metadata = json.loads(blob.download_as_text())
-                        transcripts.append(metadata)
-                    except Exception as e:
-                        print(f"Warning: failed to read metadata blob {blob.name}: {e}", file=sys.stderr)
+        transcripts.sort(key=lambda x: x.get('date', ''), reverse=True)
+        transcript_list_cache['transcripts'] = (time.monotonic() + LIST_CACHE_TTL_SECONDS, transcripts)
 
         return jsonify({
-            'transcripts': sorted(transcripts, key=lambda x: x.get('date', ''), reverse=True),
+            'transcripts': transcripts,
             'count': len(transcripts)
         })
     
@@ -587,11 +1266,11 @@ def list_transcripts():
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
-    print(f"\n{'='*60}")
-    print(f"Starting Transcription API on port {port}")
-    print(f"Model: {MODEL_NAME}")
-    print(f"GCS Bucket: {BUCKET_NAME}")
-    print(f"Chunk Length: {CHUNK_LENGTH_MS / 1000 / 60} minutes")
-    print(f"{'='*60}\n")
+    logger.info(
+        "Starting Transcription API on port %s (model=%s, bucket=%s, chunk=%s min)",
+        port, MODEL_NAME, BUCKET_NAME, CHUNK_LENGTH_MS / 1000 / 60,
+    )
     
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    # debug mode's reloader imports the module twice (loading the models twice);
+    # production should use gunicorn.conf.py instead of this dev server
+    app.run(host='0.0.0.0', port=port, debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
\ No newline at end of file
@@ -77,6 +77,8 @@ export interface TranscriptionRequest {
     hearing_date: string;
     room?: string;
     ampm?: string;
+    // false skips word-level alignment for a faster, segment-only transcript
+    align?: boolean;
 }
 
 export interface FormattedWord {